@@ -1,29 +1,52 @@
+from contextlib import contextmanager, suppress
+from functools import lru_cache
 from pathlib import Path
+from typing import IO, Iterator
 import logging
+import os
+import tempfile
 
 from app.settings import settings
 
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=1)
 def get_cache_dir() -> Path:
-    """Get or create cache directory."""
+    """Get or create cache directory (created once per process)."""
     cache_path = Path(settings.cache_dir)
     cache_path.mkdir(parents=True, exist_ok=True)
     return cache_path
 
 
+@lru_cache(maxsize=1024)
 def get_cache_path(series_id: str) -> Path:
-    """Get cache path for a specific series."""
+    """Get or create cache path for a specific series (created once per process)."""
     cache_dir = get_cache_dir()
     series_cache = cache_dir / series_id
     series_cache.mkdir(parents=True, exist_ok=True)
     return series_cache
 
 
-def ensure_cache_dir(path: Path) -> None:
-    """Ensure cache directory exists."""
-    path.mkdir(parents=True, exist_ok=True)
+@contextmanager
+def atomic_writer(path: Path) -> Iterator[IO[bytes]]:
+    """
+    Write to a temp file next to path and move it over path on success.
+    
+    Readers of path see either the old or the complete new file, never a
+    partial one; on error the temp file is removed and path is untouched.
+    """
+    # get_cache_path is memoized, so recreate a series dir removed behind its back
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        with suppress(FileNotFoundError):
+            os.unlink(tmp_path)
+        raise
 
 
 def clear_cache(series_id: str) -> None:
@@ -32,6 +55,8 @@ def clear_cache(series_id: str) -> None:
     import shutil
     try:
         shutil.rmtree(cache_path)
+        # The removed directory must be recreated on next use
+        get_cache_path.cache_clear()
         logger.info(f"Cleared cache for {series_id}")
     except Exception as e:
         logger.error(f"Error clearing cache for {series_id}: {e}")
@@ -1,104 +1,202 @@
+import hashlib
 import httpx
-import zipfile
-import json
-import time
+import orjson
 import logging
 from pathlib import Path
 from typing import Optional
 
 from app.settings import settings
-from app.cache import get_cache_path, ensure_cache_dir
+from app.cache import atomic_writer, get_cache_path
+from app.rate_limit import MAX_PAUSE, AsyncTokenBucket, retry_after
 
 logger = logging.getLogger(__name__)
 
+# Chunk size for streamed downloads
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+
+# Retry policy for throttled or temporarily unavailable responses
+MAX_ATTEMPTS = 5
+RETRY_STATUS_CODES = {429, 502, 503, 504}
+
+
+def _fingerprint(response: httpx.Response) -> Optional[str]:
+    """Server identity of a remote file (its ETag), if it sends one."""
+    return response.headers.get("etag")
+
 
 class GridClient:
     """Client for interacting with GRID File Download API."""
     
-    def __init__(self):
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
         self.base_url = settings.grid_file_api_base_url
         self.api_key = settings.grid_api_key
         self.headers = {
             "x-api-key": self.api_key,
         }
+        self._client = client
+        self.rate_limiter = self._new_rate_limiter()
+    
+    @staticmethod
+    def _new_rate_limiter() -> AsyncTokenBucket:
+        """Rate limiter for GRID requests, configured from settings."""
+        return AsyncTokenBucket(
+            rate=settings.grid_rate_limit,
+            capacity=settings.grid_rate_burst
+        )
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared async HTTP client, created on first use."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=self.headers,
+                http2=True,
+                limits=httpx.Limits(max_keepalive_connections=64, max_connections=64)
+            )
+        return self._client
     
-    def list_files(self, series_id: str) -> dict:
+    async def aclose(self) -> None:
+        """Close the shared HTTP client and reset state bound to the current event loop."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        # The limiter's asyncio.Lock cannot be reused from a later event loop
+        self.rate_limiter = self._new_rate_limiter()
+    
+    async def _request(self, method: str, url: str, stream: bool = False, **kwargs) -> httpx.Response:
+        """Send a rate-limited request, retrying throttled and transient failures."""
+        attempt = 1
+        while True:
+            await self.rate_limiter.acquire()
+            request = self.client.build_request(method, url, **kwargs)
+            
+            try:
+                response = await self.client.send(request, stream=stream)
+            except httpx.TransportError as e:
+                if attempt >= MAX_ATTEMPTS:
+                    raise
+                delay = 2 ** (attempt - 1)
+                logger.warning(f"{method} {url} failed ({e}), retrying in {delay}s")
+            else:
+                self.rate_limiter.update_from_headers(response.headers)
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= MAX_ATTEMPTS:
+                    return response
+                
+                delay = retry_after(response.headers)
+                if delay is not None and delay > MAX_PAUSE:
+                    # Don't hold every request back that long; surface the error instead
+                    logger.warning(f"{method} {url} asked to retry after {delay}s, giving up")
+                    return response
+                
+                await response.aclose()
+                if delay is None:
+                    delay = 2 ** (attempt - 1)
+                logger.warning(f"{method} {url} returned {response.status_code}, retrying in {delay}s")
+            
+            self.rate_limiter.pause(delay)
+            attempt += 1
+    
+    async def list_files(self, series_id: str) -> dict:
         """List available files for a series."""
-        url = f"{self.base_url}/list/{series_id}"
-        headers = {**self.headers, "Accept": "application/json"}
+        url = f"/list/{series_id}"
+        headers = {"Accept": "application/json"}
         
         try:
-            with httpx.Client() as client:
-                response = client.get(url, headers=headers, timeout=30)
-                if response.status_code == 401:
-                    raise Exception("Unauthorized: Check your GRID_API_KEY")
-                if response.status_code == 403:
-                    raise Exception("Forbidden: Check your API permissions")
-                response.raise_for_status()
-                return response.json()
+            response = await self._request("GET", url, headers=headers, timeout=30)
+            if response.status_code == 401:
+                raise Exception("Unauthorized: Check your GRID_API_KEY")
+            if response.status_code == 403:
+                raise Exception("Forbidden: Check your API permissions")
+            response.raise_for_status()
+            return response.json()
         except httpx.HTTPError as e:
             logger.error(f"Failed to list files for {series_id}: {e}")
             raise
     
-    def download_events_zip(self, series_id: str) -> Optional[Path]:
-        """Download and extract events JSONL files."""
-        url = f"{self.base_url}/events/grid/series/{series_id}"
-        headers = {**self.headers, "Accept": "application/zip"}
+    async def download_events_zip(self, series_id: str) -> Optional[Path]:
+        """Download the events ZIP (JSONL files are read from it directly)."""
+        url = f"/events/grid/series/{series_id}"
+        headers = {"Accept": "application/zip"}
         
         cache_dir = get_cache_path(series_id)
-        ensure_cache_dir(cache_dir)
         
         zip_path = cache_dir / "events.zip"
+        etag_path = cache_dir / "events.etag"
+        digest_path = cache_dir / "events.sha256"
         
         try:
-            with httpx.Client() as client:
-                response = client.get(url, headers=headers, timeout=60)
+            # Skip download and extraction if the cached ZIP is still current
+            if zip_path.exists() and etag_path.exists() and digest_path.exists():
+                cached_fingerprint = etag_path.read_text()
+                try:
+                    head = await self._request("HEAD", url, headers=headers, timeout=30)
+                    if head.is_success and _fingerprint(head) == cached_fingerprint:
+                        logger.info(f"Events for {series_id} unchanged, using cache")
+                        return zip_path
+                except httpx.HTTPError as e:
+                    logger.debug(f"HEAD request failed for {series_id}: {e}")
+            
+            # Invalidate the fingerprint and digest until the new ZIP is fully written
+            etag_path.unlink(missing_ok=True)
+            digest_path.unlink(missing_ok=True)
+            
+            response = await self._request("GET", url, stream=True, headers=headers, timeout=60)
+            try:
                 if response.status_code == 401:
                     raise Exception("Unauthorized: Check your GRID_API_KEY")
                 if response.status_code == 403:
                     raise Exception("Forbidden: Check your API permissions")
                 response.raise_for_status()
                 
-                # Save ZIP
-                with open(zip_path, "wb") as f:
-                    f.write(response.content)
+                # Stream ZIP to a temp file, then swap it in so concurrent
+                # readers never see a truncated archive
+                digest = hashlib.sha256()
+                with atomic_writer(zip_path) as f:
+                    async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                        f.write(chunk)
+                        digest.update(chunk)
                 
-                # Extract JSONL files
-                with zipfile.ZipFile(zip_path, "r") as z:
-                    z.extractall(cache_dir)
-                
-                logger.info(f"Downloaded and extracted events for {series_id}")
-                return cache_dir
+                fingerprint = _fingerprint(response)
+            finally:
+                await response.aclose()
+            
+            # Content digest keys the insights cache; the ETag only gates re-downloads
+            digest_path.write_text(digest.hexdigest())
+            if fingerprint:
+                etag_path.write_text(fingerprint)
+            
+            logger.info(f"Downloaded events for {series_id}")
+            return zip_path
         
         except httpx.HTTPError as e:
             logger.error(f"Failed to download events for {series_id}: {e}")
             raise
     
-    def download_end_state(self, series_id: str) -> Optional[Path]:
+    async def download_end_state(self, series_id: str) -> Optional[Path]:
         """Download end-state JSON file."""
-        url = f"{self.base_url}/end-state/grid/series/{series_id}"
-        headers = {**self.headers, "Accept": "application/json"}
+        url = f"/end-state/grid/series/{series_id}"
+        headers = {"Accept": "application/json"}
         
         cache_dir = get_cache_path(series_id)
-        ensure_cache_dir(cache_dir)
         
         end_state_path = cache_dir / "end_state.json"
         
         try:
-            with httpx.Client() as client:
-                response = client.get(url, headers=headers, timeout=30)
-                if response.status_code == 401:
-                    raise Exception("Unauthorized: Check your GRID_API_KEY")
-                if response.status_code == 403:
-                    raise Exception("Forbidden: Check your API permissions")
-                response.raise_for_status()
-                
-                # Save JSON
-                with open(end_state_path, "w") as f:
-                    json.dump(response.json(), f, indent=2)
-                
-                logger.info(f"Downloaded end-state for {series_id}")
-                return end_state_path
+            response = await self._request("GET", url, headers=headers, timeout=30)
+            if response.status_code == 401:
+                raise Exception("Unauthorized: Check your GRID_API_KEY")
+            if response.status_code == 403:
+                raise Exception("Forbidden: Check your API permissions")
+            response.raise_for_status()
+            
+            # Save JSON
+            data = orjson.loads(response.content)
+            with atomic_writer(end_state_path) as f:
+                f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+            
+            logger.info(f"Downloaded end-state for {series_id}")
+            return end_state_path
         
         except httpx.HTTPError as e:
             logger.error(f"Failed to download end-state for {series_id}: {e}")
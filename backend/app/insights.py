@@ -1,65 +1,56 @@
+import heapq
 import logging
+from dataclasses import dataclass, field
+from itertools import chain
 from typing import Dict, List, Any
 from collections import Counter, defaultdict
-import pandas as pd
 
 logger = logging.getLogger(__name__)
 
+# Number of players kept in the opening duel leaderboard
+TOP_N = 10
 
-class TacticalInsights:
-    """Generate tactical insights using pandas."""
+
+@dataclass
+class InsightBundle:
+    """Raw counters collected in a single pass over series data."""
+    maps: Counter = field(default_factory=Counter)
+    plants_by_map: Dict[str, Counter] = field(default_factory=lambda: defaultdict(Counter))
+    kills: Counter = field(default_factory=Counter)
+    deaths: Counter = field(default_factory=Counter)
+    comps_by_map: Dict[str, Counter] = field(default_factory=lambda: defaultdict(Counter))
+    # Players in first-seen kill event order (killer, then victim), for stable ties
+    players: Dict[str, None] = field(default_factory=dict)
     
-    @staticmethod
-    def analyze_maps_played(series_data: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Analyze map pool across series."""
-        maps = []
-        
-        for series in series_data:
-            end_state = series.get("end_state", {})
-            series_maps = end_state.get("maps", [])
-            
-            for map_info in series_maps:
-                if isinstance(map_info, dict):
-                    map_name = map_info.get("name") or map_info.get("map_name")
-                elif isinstance(map_info, str):
-                    map_name = map_info
-                else:
-                    map_name = "unknown"
-                
-                if map_name:
-                    maps.append(map_name)
-        
-        if not maps:
+    def __iadd__(self, other: "InsightBundle") -> "InsightBundle":
+        """Merge another bundle's counters into this one."""
+        self.maps += other.maps
+        for map_name, sites in other.plants_by_map.items():
+            self.plants_by_map[map_name] += sites
+        self.kills += other.kills
+        self.deaths += other.deaths
+        for map_name, comps in other.comps_by_map.items():
+            self.comps_by_map[map_name] += comps
+        self.players.update(other.players)
+        return self
+    
+    def maps_played(self) -> Dict[str, Any]:
+        """Map pool across series."""
+        if not self.maps:
             return {"maps": {}, "total": 0}
         
-        df = pd.DataFrame({"map": maps})
-        map_counts = df["map"].value_counts().to_dict()
-        
         return {
-            "maps": map_counts,
-            "total": len(maps)
+            "maps": dict(self.maps.most_common()),
+            "total": sum(self.maps.values())
         }
     
-    @staticmethod
-    def analyze_plant_sites(series_data: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Analyze spike plant site preference."""
-        plants_by_map = defaultdict(list)
-        
-        for series in series_data:
-            events = series.get("events", {})
-            spike_plants = events.get("spike_plants", [])
-            
-            for plant in spike_plants:
-                map_name = plant.get("map", "unknown")
-                site = plant.get("site", "unknown")
-                plants_by_map[map_name].append(site)
-        
+    def plant_sites(self) -> Dict[str, Any]:
+        """Spike plant site preference per map."""
         result = {}
-        for map_name, sites in plants_by_map.items():
+        for map_name, sites in self.plants_by_map.items():
             if sites:
-                df = pd.DataFrame({"site": sites})
-                site_counts = df["site"].value_counts().to_dict()
-                total = len(sites)
+                site_counts = dict(sites.most_common())
+                total = sum(site_counts.values())
                 site_percentages = {k: round(v / total * 100, 1) for k, v in site_counts.items()}
                 
                 result[map_name] = {
@@ -70,110 +61,104 @@ class TacticalInsights:
         
         return result
     
-    @staticmethod
-    def analyze_attack_site_preference(series_data: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Analyze overall attack site preference (similar to plant sites)."""
-        # For now, use plant data as proxy for attack preference
-        plants_by_map = defaultdict(list)
-        
-        for series in series_data:
-            events = series.get("events", {})
-            spike_plants = events.get("spike_plants", [])
-            
-            for plant in spike_plants:
-                map_name = plant.get("map", "unknown")
-                site = plant.get("site", "unknown")
-                plants_by_map[map_name].append(site)
-        
+    def opening_duels(self) -> Dict[str, Any]:
+        """Opening duel statistics for the TOP_N players by net."""
         result = {}
-        for map_name, sites in plants_by_map.items():
-            if sites:
-                df = pd.DataFrame({"site": sites})
-                site_counts = df["site"].value_counts().to_dict()
-                total = len(sites)
-                site_percentages = {k: round(v / total * 100, 1) for k, v in site_counts.items()}
-                
-                result[map_name] = {
-                    "counts": site_counts,
-                    "percentages": site_percentages,
-                    "total": total
-                }
-        
-        return result
-    
-    @staticmethod
-    def analyze_opening_duels(series_data: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Analyze opening duel statistics per player."""
-        player_stats = defaultdict(lambda: {"first_kills": 0, "first_deaths": 0})
-        
-        for series in series_data:
-            events = series.get("events", {})
-            kills = events.get("kills", [])
-            
-            for kill in kills:
-                killer = kill.get("killer")
-                victim = kill.get("victim")
-                
-                # Simplified: track all kills (not just opening duels)
-                if killer:
-                    player_stats[killer]["first_kills"] += 1
-                if victim:
-                    player_stats[victim]["first_deaths"] += 1
-        
-        # Calculate net
-        result = {}
-        for player, stats in player_stats.items():
+        for player in self.players:
             if player and player != "unknown":
-                net = stats["first_kills"] - stats["first_deaths"]
+                first_kills = self.kills[player]
+                first_deaths = self.deaths[player]
                 result[player] = {
-                    "first_kills": stats["first_kills"],
-                    "first_deaths": stats["first_deaths"],
-                    "net": net
+                    "first_kills": first_kills,
+                    "first_deaths": first_deaths,
+                    "net": first_kills - first_deaths
                 }
         
-        # Sort by net
-        sorted_result = dict(sorted(result.items(), key=lambda x: x[1]["net"], reverse=True))
-        
-        return sorted_result
+        # Select top players by net
+        return dict(heapq.nlargest(TOP_N, result.items(), key=lambda x: x[1]["net"]))
     
-    @staticmethod
-    def analyze_comp_frequency(series_data: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Analyze agent composition frequency per map."""
-        comps_by_map = defaultdict(list)
-        
-        for series in series_data:
-            end_state = series.get("end_state", {})
-            series_maps = end_state.get("maps", [])
-            comps = end_state.get("comps", {})
-            
-            # If we have map data and comp data
-            if series_maps and comps:
-                for map_info in series_maps:
-                    map_name = map_info.get("name") if isinstance(map_info, dict) else map_info
-                    
-                    # For each team comp
-                    for team, comp_data in comps.items():
-                        agents = comp_data.get("agents", [])
-                        if agents:
-                            # Create comp signature
-                            comp_sig = "+".join(sorted(agents))
-                            comps_by_map[map_name].append(comp_sig)
-        
+    def comp_frequency(self) -> Dict[str, Any]:
+        """Agent composition frequency per map."""
         result = {}
         insufficient_data = True
         
-        for map_name, comp_list in comps_by_map.items():
-            if comp_list:
+        for map_name, comps in self.comps_by_map.items():
+            if comps:
                 insufficient_data = False
-                df = pd.DataFrame({"comp": comp_list})
-                comp_counts = df["comp"].value_counts().to_dict()
-                
                 result[map_name] = {
-                    "compositions": comp_counts,
-                    "total": len(comp_list)
+                    "compositions": {"+".join(comp): count for comp, count in comps.most_common()},
+                    "total": sum(comps.values())
                 }
         
         return {
             "by_map": result,
             "insufficient_data": insufficient_data
         }
+
+
+class TacticalInsights:
+    """Generate tactical insights from parsed series data."""
+    
+    @staticmethod
+    def analyze_all(series_data: List[Dict[str, Any]]) -> InsightBundle:
+        """Collect every insight counter in one pass over the series data."""
+        bundle = InsightBundle()
+        maps = bundle.maps
+        plants_by_map = bundle.plants_by_map
+        kills = bundle.kills
+        deaths = bundle.deaths
+        comps_by_map = bundle.comps_by_map
+        players = bundle.players
+        
+        for series in series_data:
+            end_state = series.get("end_state", {})
+            events = series.get("events", {})
+            map_names = end_state.get("map_names", [])
+            team_comps = end_state.get("team_comps", [])
+            
+            maps.update(map_names)
+            
+            # Agent compositions (only when comp data is present)
+            if team_comps:
+                for map_name in map_names:
+                    comps_by_map[map_name].update(agents for team, agents in team_comps)
+            
+            plants = events.get("spike_plants") or {}
+            for map_name, site in zip(plants.get("map", ()), plants.get("site", ())):
+                plants_by_map[map_name][site] += 1
+            
+            # Simplified: track all kills (not just opening duels)
+            kill_columns = events.get("kills") or {}
+            killers = kill_columns.get("killer", ())
+            victims = kill_columns.get("victim", ())
+            kills.update(filter(None, killers))
+            deaths.update(filter(None, victims))
+            players.update(dict.fromkeys(filter(None, chain.from_iterable(zip(killers, victims)))))
+        
+        return bundle
+    
+    @staticmethod
+    def analyze_maps_played(series_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Analyze map pool across series."""
+        return TacticalInsights.analyze_all(series_data).maps_played()
+    
+    @staticmethod
+    def analyze_plant_sites(series_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Analyze spike plant site preference."""
+        return TacticalInsights.analyze_all(series_data).plant_sites()
+    
+    @staticmethod
+    def analyze_attack_site_preference(series_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Analyze overall attack site preference (similar to plant sites)."""
+        # For now, use plant data as proxy for attack preference
+        return TacticalInsights.analyze_all(series_data).plant_sites()
+    
+    @staticmethod
+    def analyze_opening_duels(series_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Analyze opening duel statistics per player."""
+        return TacticalInsights.analyze_all(series_data).opening_duels()
+    
+    @staticmethod
+    def analyze_comp_frequency(series_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Analyze agent composition frequency per map."""
+        return TacticalInsights.analyze_all(series_data).comp_frequency()
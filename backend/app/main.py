@@ -1,14 +1,24 @@
+import asyncio
+import hashlib
 import logging
-import time
-from typing import List, Dict, Any
+import multiprocessing
+import operator
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager
+from functools import reduce
+from typing import List, Dict, Any, Optional
 
 from fastapi import FastAPI, HTTPException, Query
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 
 from app.settings import settings
 from app.grid_client import GridClient
 from app.parsers import EventParser, EndStateParser
-from app.insights import TacticalInsights
+from app.cache import atomic_writer, get_cache_path
+from app.insights import InsightBundle, TacticalInsights
 from app.report import ReportGenerator
 from app.schemas import ScoutRequest, ScoutResponse, HealthResponse
 
@@ -19,13 +29,160 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+grid_client = GridClient()
+
+# Bump when InsightBundle's contents change so stale caches are ignored
+INSIGHTS_CACHE_VERSION = "5"
+
+# Worker processes for CPU-bound parsing and aggregation, owned by the lifespan
+EXECUTOR: Optional[ProcessPoolExecutor] = None
+
+def _new_executor() -> ProcessPoolExecutor:
+    """Parser worker pool; forkserver avoids forking the running server's threads and sockets."""
+    return ProcessPoolExecutor(
+        max_workers=os.cpu_count(),
+        mp_context=multiprocessing.get_context("forkserver")
+    )
+
+
+# Process-wide cap on series being fetched and parsed at once, across requests
+SERIES_SEMAPHORE: Optional[asyncio.Semaphore] = None
+
+
+def _series_semaphore() -> asyncio.Semaphore:
+    """Shared series semaphore (created lazily when no lifespan has run)."""
+    global SERIES_SEMAPHORE
+    if SERIES_SEMAPHORE is None:
+        SERIES_SEMAPHORE = asyncio.Semaphore(settings.max_concurrent_series)
+    return SERIES_SEMAPHORE
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start parser workers; release them and the shared GRID HTTP client on shutdown."""
+    global EXECUTOR, SERIES_SEMAPHORE
+    EXECUTOR = _new_executor()
+    # Semaphores bind to the running event loop, so make one per lifespan
+    SERIES_SEMAPHORE = asyncio.Semaphore(settings.max_concurrent_series)
+    try:
+        yield
+    finally:
+        await grid_client.aclose()
+        EXECUTOR.shutdown()
+        EXECUTOR = None
+        SERIES_SEMAPHORE = None
+
+
 app = FastAPI(
     title="VALORANT Scout POC",
     description="Scouting report generator using GRID File Download API",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
-grid_client = GridClient()
+
+def _insights_key(series_id: str) -> Optional[str]:
+    """Content key for a series' cached insights, from digests of its source files."""
+    cache_dir = get_cache_path(series_id)
+    try:
+        digests = [
+            INSIGHTS_CACHE_VERSION,
+            (cache_dir / "events.sha256").read_text(),
+            # end_state.json is re-downloaded on every call and small; hash it directly
+            hashlib.sha256((cache_dir / "end_state.json").read_bytes()).hexdigest()
+        ]
+    except FileNotFoundError:
+        return None
+    return hashlib.sha256("\0".join(digests).encode()).hexdigest()
+
+
+def _per_series_insights(series_id: str) -> InsightBundle:
+    """Parse and aggregate one series, reusing cached insights when its files are unchanged."""
+    key = _insights_key(series_id)
+    cache_dir = get_cache_path(series_id)
+    insights_path = cache_dir / "insights.pkl"
+    
+    if key and insights_path.exists():
+        try:
+            with open(insights_path, "rb") as f:
+                cached_key, bundle = pickle.load(f)
+            if cached_key == key:
+                logger.debug(f"Using cached insights for {series_id}")
+                return bundle
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable insights cache for {series_id}: {e}")
+    
+    # Parse events
+    logger.debug(f"Parsing events for {series_id}")
+    events = EventParser.parse_events(series_id)
+    
+    # Parse end-state
+    logger.debug(f"Parsing end-state for {series_id}")
+    end_state = EndStateParser.parse_end_state(series_id)
+    
+    bundle = TacticalInsights.analyze_all([{
+        "series_id": series_id,
+        "events": events,
+        "end_state": end_state
+    }])
+    
+    # Never cache a bundle built from partially parsed files
+    if events.get("errors") or end_state.get("errors"):
+        logger.warning(f"Not caching insights for {series_id}: parse errors")
+        if events.get("errors"):
+            # Force a fresh download of the archive on the next request
+            (cache_dir / "events.etag").unlink(missing_ok=True)
+    elif key and _insights_key(series_id) == key:
+        # Files unchanged while parsing (a concurrent download could replace them)
+        with atomic_writer(insights_path) as f:
+            pickle.dump((key, bundle), f, protocol=pickle.HIGHEST_PROTOCOL)
+    
+    return bundle
+
+
+async def _parse_in_pool(series_id: str) -> InsightBundle:
+    """Run _per_series_insights in the worker pool, replacing the pool once if it broke."""
+    # Falls back to the default thread pool when no lifespan has run
+    global EXECUTOR
+    loop = asyncio.get_running_loop()
+    executor = EXECUTOR
+    try:
+        return await loop.run_in_executor(executor, _per_series_insights, series_id)
+    except BrokenProcessPool:
+        # A worker died (e.g. OOM-killed); later requests must not inherit the dead pool
+        logger.warning(f"Worker pool broke while parsing {series_id}, restarting it")
+        if EXECUTOR is executor:
+            EXECUTOR = _new_executor()
+            executor.shutdown(wait=False)
+        return await loop.run_in_executor(EXECUTOR, _per_series_insights, series_id)
+
+
+async def process_one(series_id: str, semaphore: asyncio.Semaphore) -> InsightBundle:
+    """Download, parse and aggregate a single series."""
+    async with semaphore:
+        try:
+            logger.info(f"Processing series: {series_id}")
+            
+            # List files and download events + end-state concurrently
+            logger.debug(f"Fetching files for {series_id}")
+            files, _, _ = await asyncio.gather(
+                grid_client.list_files(series_id),
+                grid_client.download_events_zip(series_id),
+                grid_client.download_end_state(series_id)
+            )
+            
+            # Parse and aggregate off the event loop
+            bundle = await _parse_in_pool(series_id)
+            
+            logger.info(f"Successfully processed {series_id}")
+            return bundle
+        
+        except Exception as e:
+            logger.error(f"Error processing series {series_id}: {e}")
+            raise HTTPException(
+                status_code=500,
+                detail=f"Error processing series {series_id}: {str(e)}"
+            )
 
 
 @app.get("/health", response_model=HealthResponse)
@@ -37,7 +194,7 @@ async def health_check():
     )
 
 
-@app.get("/scout/valorant")
+@app.get("/scout/valorant", response_class=ORJSONResponse)
 async def scout_valorant(
     series_ids: str = Query(None, description="Comma-separated series IDs"),
     team_id: str = Query(None, description="Team ID (not yet implemented)"),
@@ -74,52 +231,16 @@ async def scout_valorant(
     parsed_series_ids = [s.strip() for s in series_ids.split(",")]
     logger.info(f"Generating scout report for {len(parsed_series_ids)} series: {parsed_series_ids}")
     
-    # Fetch and parse data for each series
-    series_data = []
-    
-    for series_id in parsed_series_ids:
-        try:
-            logger.info(f"Processing series: {series_id}")
-            
-            # Rate limit protection
-            time.sleep(0.5)
-            
-            # List files
-            logger.debug(f"Listing files for {series_id}")
-            files = grid_client.list_files(series_id)
-            
-            # Download events
-            logger.debug(f"Downloading events for {series_id}")
-            grid_client.download_events_zip(series_id)
-            
-            # Download end-state
-            logger.debug(f"Downloading end-state for {series_id}")
-            grid_client.download_end_state(series_id)
-            
-            # Parse events
-            logger.debug(f"Parsing events for {series_id}")
-            events = EventParser.parse_events(series_id)
-            
-            # Parse end-state
-            logger.debug(f"Parsing end-state for {series_id}")
-            end_state = EndStateParser.parse_end_state(series_id)
-            
-            series_data.append({
-                "series_id": series_id,
-                "events": events,
-                "end_state": end_state
-            })
-            
-            logger.info(f"Successfully processed {series_id}")
-        
-        except Exception as e:
-            logger.error(f"Error processing series {series_id}: {e}")
-            raise HTTPException(
-                status_code=500,
-                detail=f"Error processing series {series_id}: {str(e)}"
-            )
+    # Fetch and parse each distinct series concurrently
+    unique_series_ids = list(dict.fromkeys(parsed_series_ids))
+    semaphore = _series_semaphore()
+    results = await asyncio.gather(
+        *(process_one(series_id, semaphore) for series_id in unique_series_ids)
+    )
+    bundles_by_id = dict(zip(unique_series_ids, results))
+    bundles = [bundles_by_id[series_id] for series_id in parsed_series_ids]
     
-    if not series_data:
+    if not bundles:
         raise HTTPException(
             status_code=400,
             detail="No valid series data could be retrieved"
@@ -127,11 +248,13 @@ async def scout_valorant(
     
     # Generate insights
     logger.info("Generating tactical insights")
-    maps_played = TacticalInsights.analyze_maps_played(series_data)
-    attack_site_preference = TacticalInsights.analyze_attack_site_preference(series_data)
-    plant_sites = TacticalInsights.analyze_plant_sites(series_data)
-    opening_duels = TacticalInsights.analyze_opening_duels(series_data)
-    comp_frequency = TacticalInsights.analyze_comp_frequency(series_data)
+    insights = reduce(operator.iadd, bundles, InsightBundle())
+    maps_played = insights.maps_played()
+    # Attack preference uses plant data as a proxy, so both share one result
+    plant_sites = insights.plant_sites()
+    attack_site_preference = plant_sites
+    opening_duels = insights.opening_duels()
+    comp_frequency = insights.comp_frequency()
     
     # Generate markdown report
     logger.info("Generating markdown report")
@@ -156,7 +279,7 @@ async def scout_valorant(
     }
     
     logger.info("Scout report generated successfully")
-    return JSONResponse(content=response)
+    return ORJSONResponse(content=response)
 
 
 if __name__ == "__main__":
@@ -1,108 +1,359 @@
-import json
 import logging
-from pathlib import Path
-from typing import Dict, List, Any, Optional
-from collections import defaultdict
+import mmap
+import orjson
+import sys
+import zipfile
+from concurrent.futures import Executor
+from itertools import chain, repeat
+from pathlib import Path, PurePosixPath
+from typing import IO, Dict, List, Any, Iterator, Optional, Tuple
+from collections import Counter, defaultdict
 
-from app.cache import get_cache_path
+from app.cache import atomic_writer, get_cache_path
 
 logger = logging.getLogger(__name__)
 
+# Block size for reading JSONL members out of the events archive
+READ_CHUNK_SIZE = 1 << 20
+
+# Event classification flags returned by EventParser._classify
+PLANT = 1
+KILL = 2
+
+# Sentinel for absent alias fields
+_MISSING = object()
+
+# Flags memoized per (event_type, type) pair; event types are low-cardinality
+_FLAGS_BY_TYPE: Dict[tuple, int] = {}
+MAX_MEMOIZED_TYPES = 4096
+
+# Column layout of the spike_plants / kills tables returned by parse_events.
+PLANT_COLUMNS = ("map", "site", "round", "timestamp", "round_time")
+KILL_COLUMNS = ("killer", "victim", "round", "timestamp", "round_time")
+
+# Extra column, only present with include_events_by_round: the (round key,
+# index) of each row's source event in events_by_round
+ROUND_INDEX_COLUMN = "by_round_index"
+
+
+def _iter_lines(f: IO[bytes]) -> Iterator[bytes]:
+    """Yield newline-delimited lines from a binary stream, read in large blocks."""
+    tail = b""
+    while True:
+        block = f.read(READ_CHUNK_SIZE)
+        if not block:
+            break
+        lines = (tail + block).split(b"\n")
+        tail = lines.pop()
+        yield from lines
+    if tail:
+        yield tail
+
+
+def _iter_events(archive: zipfile.ZipFile, name: str) -> Iterator[Dict[str, Any]]:
+    """Lazily decode a JSONL member of the events archive, one event per non-empty line."""
+    with archive.open(name) as f:
+        for line in _iter_lines(f):
+            if not line or line.isspace():
+                continue
+            yield orjson.loads(line)
+
+
+def _columns(names: Tuple[str, ...], rows: List[tuple]) -> Dict[str, list]:
+    """Transpose extracted rows into one list per column."""
+    if not rows:
+        return {name: [] for name in names}
+    return dict(zip(names, map(list, zip(*rows))))
+
+
+def _table_columns(columns: Tuple[str, ...], include_round_index: bool) -> Tuple[str, ...]:
+    """Column names of a plant/kill table, with the events_by_round index if requested."""
+    return columns + (ROUND_INDEX_COLUMN,) if include_round_index else columns
+
+
+def _rebase_refs(refs: List[tuple], offsets: Dict[Any, int]) -> List[tuple]:
+    """Shift per-member by_round_index positions past events already merged."""
+    return [(round_id, offsets[round_id] + position) for round_id, position in refs]
+
+
+def _load_json(path: Path) -> Any:
+    """Decode a JSON file through a read-only memory map."""
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            with memoryview(mm) as view:
+                return orjson.loads(view)
+
+
+def _open_archive(zip_path: Path) -> Optional[zipfile.ZipFile]:
+    """Open the cached events archive, or None if it is missing or corrupt."""
+    try:
+        return zipfile.ZipFile(zip_path, "r")
+    except (FileNotFoundError, zipfile.BadZipFile) as e:
+        logger.error(f"Cannot open events archive {zip_path}: {e}")
+        return None
+
 
 class EventParser:
-    """Parse GRID events JSONL files."""
+    """Parse GRID events JSONL files from the cached events archive."""
     
     @staticmethod
-    def parse_events(series_id: str) -> Dict[str, Any]:
+    def parse_events(
+        series_id: str,
+        executor: Optional[Executor] = None,
+        *,
+        include_events_by_round: bool = False
+    ) -> Dict[str, Any]:
         """
-        Parse events from JSONL files in cache.
+        Parse events from the JSONL files in the cached events.zip.
         Returns structured data for analysis.
+        
+        Only per-round event counts are kept by default; pass
+        include_events_by_round=True to also get every decoded event grouped
+        by round. JSONL members are independent; pass an executor to parse
+        them in parallel. "errors" counts unreadable archives and members.
         """
         cache_dir = get_cache_path(series_id)
+        zip_path = cache_dir / "events.zip"
+        round_counts = Counter()
         events_by_round = defaultdict(list)
-        spike_plants = []
-        kills = []
+        spike_plants = _columns(_table_columns(PLANT_COLUMNS, include_events_by_round), [])
+        kills = _columns(_table_columns(KILL_COLUMNS, include_events_by_round), [])
         schema_preview = {}
+        errors = 0
         
-        # Find all JSONL files
-        jsonl_files = list(cache_dir.glob("**/*.jsonl"))
+        # Find all JSONL members in the archive
+        archive = _open_archive(zip_path)
+        jsonl_files = []
+        if archive is None:
+            errors += 1
+        else:
+            jsonl_files = [name for name in archive.namelist() if name.endswith(".jsonl")]
         
         if not jsonl_files:
+            if archive is not None:
+                archive.close()
             logger.warning(f"No JSONL files found in {cache_dir}")
-            return {
-                "spike_plants": [],
-                "kills": [],
-                "events_by_round": {},
-                "schema_preview": {}
+            result = {
+                "spike_plants": spike_plants,
+                "kills": kills,
+                "round_counts": {},
+                "schema_preview": {},
+                "errors": errors
             }
+            if include_events_by_round:
+                result["events_by_round"] = {}
+            return result
         
-        for jsonl_file in jsonl_files:
-            try:
-                with open(jsonl_file, "r") as f:
-                    for line in f:
-                        if not line.strip():
-                            continue
-                        
-                        event = json.loads(line)
-                        
-                        # Capture schema preview
-                        if not schema_preview:
-                            schema_preview = {
-                                "sample_keys": list(event.keys())[:10],
-                                "file": str(jsonl_file.name)
-                            }
-                        
-                        # Detect spike plant events
-                        if EventParser._is_spike_plant(event):
-                            plant = EventParser._extract_plant_info(event)
-                            if plant:
-                                spike_plants.append(plant)
-                        
-                        # Detect kill events
-                        if EventParser._is_kill(event):
-                            kill = EventParser._extract_kill_info(event)
-                            if kill:
-                                kills.append(kill)
-                        
-                        # Group by round
-                        round_id = event.get("round_id", "unknown")
-                        events_by_round[round_id].append(event)
+        with archive:
+            # Workers reopen the archive by path; serially, members share the open one
+            if executor:
+                results = executor.map(
+                    EventParser._parse_member,
+                    repeat(zip_path),
+                    jsonl_files,
+                    repeat(include_events_by_round)
+                )
+            else:
+                results = map(
+                    EventParser._parse_archive_member,
+                    repeat(archive),
+                    jsonl_files,
+                    repeat(include_events_by_round)
+                )
             
-            except json.JSONDecodeError as e:
-                logger.error(f"JSON parse error in {jsonl_file}: {e}")
-            except Exception as e:
-                logger.error(f"Error processing {jsonl_file}: {e}")
+            # Merge per-member results in archive order
+            for (member_plants, member_kills, member_counts, member_rounds,
+                 member_preview, member_errors) in results:
+                if include_events_by_round:
+                    offsets = {round_id: round_counts[round_id] for round_id in member_counts}
+                    if any(offsets.values()):
+                        for member_table in (member_plants, member_kills):
+                            member_table[ROUND_INDEX_COLUMN] = _rebase_refs(
+                                member_table[ROUND_INDEX_COLUMN], offsets
+                            )
+                
+                for name, column in member_plants.items():
+                    spike_plants[name].extend(column)
+                for name, column in member_kills.items():
+                    kills[name].extend(column)
+                round_counts.update(member_counts)
+                for round_id, round_events in member_rounds.items():
+                    events_by_round[round_id].extend(round_events)
+                if not schema_preview:
+                    schema_preview = member_preview
+                errors += member_errors
         
-        # Save schema preview
-        schema_path = cache_dir / "schema_preview.json"
-        with open(schema_path, "w") as f:
-            json.dump(schema_preview, f, indent=2)
+        # Save schema preview (single write, then atomic rename over the old one)
+        with atomic_writer(cache_dir / "schema_preview.json") as f:
+            f.write(orjson.dumps(schema_preview, option=orjson.OPT_INDENT_2))
         
-        return {
+        result = {
             "spike_plants": spike_plants,
             "kills": kills,
-            "events_by_round": dict(events_by_round),
-            "schema_preview": schema_preview
+            "round_counts": dict(round_counts),
+            "schema_preview": schema_preview,
+            "errors": errors
         }
+        if include_events_by_round:
+            # Stop auto-inserting on lookups instead of copying into a plain dict
+            events_by_round.default_factory = None
+            result["events_by_round"] = events_by_round
+        return result
+    
+    @staticmethod
+    def _parse_member(
+        zip_path: Path,
+        jsonl_file: str,
+        include_events_by_round: bool = False
+    ) -> Tuple[dict, dict, dict, dict, dict, int]:
+        """Open the archive and parse one JSONL member (executor entry point)."""
+        with zipfile.ZipFile(zip_path, "r") as archive:
+            return EventParser._parse_archive_member(archive, jsonl_file, include_events_by_round)
+    
+    @staticmethod
+    def _parse_archive_member(
+        archive: zipfile.ZipFile,
+        jsonl_file: str,
+        include_events_by_round: bool = False
+    ) -> Tuple[dict, dict, dict, dict, dict, int]:
+        """
+        Parse one JSONL member into plant/kill columns, per-round counts,
+        events by round (only when requested), a schema preview and an error
+        count (1 if the member could not be read to the end).
+        """
+        round_counts = {}
+        events_by_round = {}
+        spike_plants = []
+        kills = []
+        schema_preview = {}
+        errors = 0
+        plant_columns = _table_columns(PLANT_COLUMNS, include_events_by_round)
+        kill_columns = _table_columns(KILL_COLUMNS, include_events_by_round)
+        
+        # Bind hot-loop callables to locals once per member
+        classify = EventParser._classify
+        extract_plant = EventParser._extract_plant_info
+        extract_kill = EventParser._extract_kill_info
+        plants_append = spike_plants.append
+        kills_append = kills.append
+        counts_get = round_counts.get
+        rounds_get = events_by_round.get
+        intern = sys.intern
+        
+        try:
+            events = _iter_events(archive, jsonl_file)
+            
+            # Capture schema preview from the first event
+            first = next(events, None)
+            if first is None:
+                return (
+                    _columns(plant_columns, spike_plants),
+                    _columns(kill_columns, kills),
+                    round_counts,
+                    events_by_round,
+                    schema_preview,
+                    0
+                )
+            schema_preview = {
+                "sample_keys": list(first.keys())[:10],
+                "file": PurePosixPath(jsonl_file).name
+            }
+            
+            for event in chain((first,), events):
+                # Count by round (round ids are few; intern them for identity compares)
+                round_id = event.get("round_id", "unknown")
+                if type(round_id) is str:
+                    round_id = intern(round_id)
+                position = counts_get(round_id, 0)
+                round_counts[round_id] = position + 1
+                
+                if include_events_by_round:
+                    round_events = rounds_get(round_id)
+                    if round_events is None:
+                        round_events = events_by_round[round_id] = []
+                    round_events.append(event)
+                
+                flags = classify(event)
+                if not flags:
+                    continue
+                
+                # Detect spike plant events
+                if flags & PLANT:
+                    plant = extract_plant(event)
+                    if plant:
+                        if include_events_by_round:
+                            plant += ((round_id, position),)
+                        plants_append(plant)
+                
+                # Detect kill events
+                if flags & KILL:
+                    kill = extract_kill(event)
+                    if kill:
+                        if include_events_by_round:
+                            kill += ((round_id, position),)
+                        kills_append(kill)
+        
+        except orjson.JSONDecodeError as e:
+            logger.error(f"JSON parse error in {jsonl_file}: {e}")
+            errors = 1
+        except Exception as e:
+            logger.error(f"Error processing {jsonl_file}: {e}")
+            errors = 1
+        
+        return (
+            _columns(plant_columns, spike_plants),
+            _columns(kill_columns, kills),
+            round_counts,
+            events_by_round,
+            schema_preview,
+            errors
+        )
+    
+    @staticmethod
+    def _classify(event: dict) -> int:
+        """Classify an event as a PLANT and/or KILL with one read of its type fields."""
+        event_type = event.get("event_type", "")
+        raw_type = event.get("type")
+        try:
+            return _FLAGS_BY_TYPE[event_type, raw_type]
+        except KeyError:
+            pass
+        except TypeError:
+            # Unhashable type field; classify without memoizing
+            return EventParser._classify_types(event_type, raw_type)
+        
+        flags = EventParser._classify_types(event_type, raw_type)
+        if len(_FLAGS_BY_TYPE) < MAX_MEMOIZED_TYPES:
+            _FLAGS_BY_TYPE[event_type, raw_type] = flags
+        return flags
+    
+    @staticmethod
+    def _classify_types(event_type: str, raw_type: Any) -> int:
+        """Compute PLANT/KILL flags from an event's event_type and type fields."""
+        event_type = event_type.lower()
+        flags = 0
+        if "plant" in event_type or raw_type == "plant_spike":
+            flags |= PLANT
+        if "kill" in event_type or raw_type == "kill":
+            flags |= KILL
+        return flags
     
     @staticmethod
     def _is_spike_plant(event: dict) -> bool:
         """Check if event is a spike plant."""
-        event_type = event.get("event_type", "").lower()
-        return "plant" in event_type or event.get("type") == "plant_spike"
+        return bool(EventParser._classify(event) & PLANT)
     
     @staticmethod
-    def _extract_plant_info(event: dict) -> Optional[dict]:
-        """Extract relevant plant event info."""
+    def _extract_plant_info(event: dict) -> Optional[tuple]:
+        """Extract relevant plant event info as a PLANT_COLUMNS row."""
         try:
-            return {
-                "map": event.get("map") or event.get("map_name") or "unknown",
-                "site": event.get("site", "unknown"),
-                "round": event.get("round_id"),
-                "timestamp": event.get("timestamp"),
-                "round_time": event.get("round_time"),
-                "raw_event": event
-            }
+            return (
+                event.get("map") or event.get("map_name") or "unknown",
+                event.get("site", "unknown"),
+                event.get("round_id"),
+                event.get("timestamp"),
+                event.get("round_time")
+            )
         except Exception as e:
             logger.debug(f"Error extracting plant info: {e}")
             return None
@@ -110,21 +361,19 @@ class EventParser:
     @staticmethod
     def _is_kill(event: dict) -> bool:
         """Check if event is a kill."""
-        event_type = event.get("event_type", "").lower()
-        return "kill" in event_type or event.get("type") == "kill"
+        return bool(EventParser._classify(event) & KILL)
     
     @staticmethod
-    def _extract_kill_info(event: dict) -> Optional[dict]:
-        """Extract relevant kill event info."""
+    def _extract_kill_info(event: dict) -> Optional[tuple]:
+        """Extract relevant kill event info as a KILL_COLUMNS row."""
         try:
-            return {
-                "killer": event.get("killer") or event.get("killer_name"),
-                "victim": event.get("victim") or event.get("victim_name"),
-                "round": event.get("round_id"),
-                "timestamp": event.get("timestamp"),
-                "round_time": event.get("round_time"),
-                "raw_event": event
-            }
+            return (
+                event.get("killer") or event.get("killer_name"),
+                event.get("victim") or event.get("victim_name"),
+                event.get("round_id"),
+                event.get("timestamp"),
+                event.get("round_time")
+            )
         except Exception as e:
             logger.debug(f"Error extracting kill info: {e}")
             return None
@@ -144,12 +393,12 @@ class EndStateParser:
             return {
                 "maps": [],
                 "comps": [],
-                "players": []
+                "players": [],
+                "errors": 1
             }
         
         try:
-            with open(end_state_path, "r") as f:
-                data = json.load(f)
+            data = _load_json(end_state_path)
             
             maps = []
             comps = defaultdict(lambda: {"agents": []})
@@ -162,29 +411,51 @@ class EndStateParser:
             # Extract player agents (if present)
             if "players" in data:
                 for player in data.get("players", []):
+                    # Resolve aliased fields once for both the player row and the comp
+                    agent = player.get("agent") or player.get("selected_agent", _MISSING)
+                    team = player.get("team", "unknown")
                     player_info = {
                         "name": player.get("name", "unknown"),
-                        "agent": player.get("agent") or player.get("selected_agent", "unknown"),
-                        "team": player.get("team", "unknown")
+                        "agent": "unknown" if agent is _MISSING else agent,
+                        "team": team
                     }
                     players.append(player_info)
                     
                     # Track comps by team
-                    team = player.get("team", "unknown")
-                    agent = player.get("agent") or player.get("selected_agent")
-                    if agent:
+                    if agent and agent is not _MISSING:
                         comps[team]["agents"].append(agent)
             
+            # Normalize map names and team comps once for the insight pass
+            map_names = []
+            for map_info in maps:
+                if isinstance(map_info, dict):
+                    map_name = map_info.get("name") or map_info.get("map_name")
+                elif isinstance(map_info, str):
+                    map_name = map_info
+                else:
+                    map_name = "unknown"
+                
+                if map_name:
+                    map_names.append(sys.intern(str(map_name)))
+            
+            team_comps = [
+                (team, tuple(sorted(comp["agents"])))
+                for team, comp in comps.items()
+            ]
+            
             return {
                 "maps": maps,
+                "map_names": map_names,
                 "comps": dict(comps),
+                "team_comps": team_comps,
                 "players": players,
-                "raw_data": data
+                "raw_data": data,
+                "errors": 0
             }
         
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             logger.error(f"JSON parse error in end_state.json: {e}")
-            return {"maps": [], "comps": [], "players": []}
+            return {"maps": [], "comps": [], "players": [], "errors": 1}
         except Exception as e:
             logger.error(f"Error parsing end_state.json: {e}")
-            return {"maps": [], "comps": [], "players": []}
+            return {"maps": [], "comps": [], "players": [], "errors": 1}
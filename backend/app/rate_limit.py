@@ -0,0 +1,111 @@
+import asyncio
+import logging
+import time
+from typing import Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+# Longest rate-limit headers may hold back all requests
+MAX_PAUSE = 60.0
+
+
+class AsyncTokenBucket:
+    """
+    Token bucket rate limiter shared by concurrent coroutines.
+    
+    A rate of 0 means no client-side limit: requests are only held back while
+    X-RateLimit-* headers report a tighter window, and only until it resets.
+    """
+    
+    def __init__(self, rate: float, capacity: int):
+        self.base_rate = rate
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._rate_until = 0.0
+        self._resume_at = 0.0
+        self._lock = asyncio.Lock()
+    
+    def _refill(self, now: float) -> None:
+        """Add tokens for the time elapsed since the last refill."""
+        if now >= self._rate_until:
+            # Header-derived rate expired with its window
+            self.rate = self.base_rate
+        if self.rate > 0:
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        else:
+            self._tokens = float(self.capacity)
+        self._updated = now
+    
+    async def acquire(self) -> None:
+        """Wait until a request may be sent."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._resume_at:
+                    await asyncio.sleep(self._resume_at - now)
+                    continue
+                
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                
+                # Wake up no later than the end of a header window, and never
+                # sleep longer than MAX_PAUSE while holding the lock
+                wait = (1 - self._tokens) / self.rate
+                if now < self._rate_until:
+                    wait = min(wait, self._rate_until - now)
+                await asyncio.sleep(min(wait, MAX_PAUSE))
+    
+    def pause(self, seconds: float) -> None:
+        """Hold back all requests for the given number of seconds (at most MAX_PAUSE)."""
+        seconds = min(seconds, MAX_PAUSE)
+        self._resume_at = max(self._resume_at, time.monotonic() + seconds)
+    
+    def update_from_headers(self, headers: Mapping[str, str]) -> None:
+        """Adapt to X-RateLimit-Remaining / X-RateLimit-Reset response headers."""
+        remaining = headers.get("x-ratelimit-remaining")
+        reset = headers.get("x-ratelimit-reset")
+        if remaining is None or reset is None:
+            return
+        
+        try:
+            remaining = int(remaining)
+            reset_in = float(reset)
+        except ValueError:
+            return
+        
+        # Reset is either seconds until the window resets or an epoch timestamp
+        if reset_in > 1_000_000_000:
+            reset_in -= time.time()
+        if reset_in <= 0:
+            return
+        
+        if remaining <= 0:
+            logger.info(f"Rate limit exhausted, pausing requests for {min(reset_in, MAX_PAUSE):.1f}s")
+            self.pause(reset_in)
+            return
+        
+        # Spread the remaining budget over the window, never above the configured rate.
+        # Like a pause, the window holds for at most MAX_PAUSE.
+        window_rate = remaining / reset_in
+        if self.base_rate > 0:
+            window_rate = min(window_rate, self.base_rate)
+        now = time.monotonic()
+        self._refill(now)
+        self._tokens = min(self._tokens, remaining)
+        self.rate = window_rate
+        self._rate_until = now + min(reset_in, MAX_PAUSE)
+
+
+def retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """Seconds to wait according to a Retry-After header, if present."""
+    value = headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        return None
@@ -1,6 +1,12 @@
-from typing import Dict, List, Any
+from itertools import chain, islice
+from typing import Dict, Iterator, List, Any
 from datetime import datetime
 
+# Row templates for the per-map tables, bound once at import
+_COUNT_ROW = "| %s | %d |".__mod__
+_PERCENT_ROW = "| %s | %d | %s%% |".__mod__
+_COMP_ROW = "- **%s** (%dx)".__mod__
+
 
 class ReportGenerator:
     """Generate markdown scouting reports."""
@@ -16,204 +22,179 @@ class ReportGenerator:
     ) -> str:
         """Generate comprehensive markdown scouting report."""
         
-        report_lines = [
+        header = (
             "# VALORANT Scouting Report",
             f"**Generated:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC')}",
             f"**Series Analyzed:** {', '.join(series_ids)}",
             "",
-        ]
-        
-        # Map Pool
-        report_lines.extend(ReportGenerator._section_map_pool(maps_played))
-        
-        # Attack Site Preference
-        report_lines.extend(ReportGenerator._section_attack_sites(attack_site_preference))
-        
-        # Plant Sites (detailed)
-        report_lines.extend(ReportGenerator._section_plant_sites(plant_sites))
-        
-        # Opening Duels
-        report_lines.extend(ReportGenerator._section_opening_duels(opening_duels))
-        
-        # Agent Compositions
-        report_lines.extend(ReportGenerator._section_comps(comp_frequency))
-        
-        # Summary
-        report_lines.extend(ReportGenerator._section_summary(
-            maps_played,
-            attack_site_preference,
-            opening_duels
+        )
+        
+        return "\n".join(chain(
+            header,
+            # Map Pool
+            ReportGenerator._section_map_pool(maps_played),
+            # Attack Site Preference
+            ReportGenerator._section_attack_sites(attack_site_preference),
+            # Plant Sites (detailed)
+            ReportGenerator._section_plant_sites(plant_sites),
+            # Opening Duels
+            ReportGenerator._section_opening_duels(opening_duels),
+            # Agent Compositions
+            ReportGenerator._section_comps(comp_frequency),
+            # Summary
+            ReportGenerator._section_summary(
+                maps_played,
+                attack_site_preference,
+                opening_duels
+            )
         ))
-        
-        return "\n".join(report_lines)
     
     @staticmethod
-    def _section_map_pool(maps_played: Dict[str, Any]) -> List[str]:
+    def _section_map_pool(maps_played: Dict[str, Any]) -> Iterator[str]:
         """Generate map pool section."""
-        lines = [
-            "## Map Pool",
-            ""
-        ]
+        yield "## Map Pool"
+        yield ""
         
         maps = maps_played.get("maps", {})
         if not maps:
-            lines.append("*No map data available*")
-            return lines
+            yield "*No map data available*"
+            return
         
-        lines.append("| Map | Appearances |")
-        lines.append("|-----|-------------|")
+        yield "| Map | Appearances |"
+        yield "|-----|-------------|"
         
-        for map_name, count in sorted(maps.items(), key=lambda x: x[1], reverse=True):
-            lines.append(f"| {map_name} | {count} |")
+        # Counts arrive in most_common() order from the insights
+        for map_name, count in maps.items():
+            yield _COUNT_ROW((map_name, count))
         
-        lines.append("")
-        return lines
+        yield ""
     
     @staticmethod
-    def _section_attack_sites(attack_site_preference: Dict[str, Any]) -> List[str]:
+    def _section_attack_sites(attack_site_preference: Dict[str, Any]) -> Iterator[str]:
         """Generate attack site preference section."""
-        lines = [
-            "## Attack Site Preference",
-            ""
-        ]
+        yield "## Attack Site Preference"
+        yield ""
         
         if not attack_site_preference:
-            lines.append("*No site preference data available*")
-            lines.append("")
-            return lines
+            yield "*No site preference data available*"
+            yield ""
+            return
         
         for map_name, data in sorted(attack_site_preference.items()):
-            lines.append(f"### {map_name}")
-            lines.append("")
-            lines.append("| Site | Count | Percentage |")
-            lines.append("|------|-------|-----------|")
+            yield f"### {map_name}"
+            yield ""
+            yield "| Site | Count | Percentage |"
+            yield "|------|-------|-----------|"
             
             counts = data.get("counts", {})
             percentages = data.get("percentages", {})
             
-            for site, count in sorted(counts.items(), key=lambda x: x[1], reverse=True):
+            for site, count in counts.items():
                 pct = percentages.get(site, 0)
-                lines.append(f"| {site} | {count} | {pct}% |")
+                yield _PERCENT_ROW((site, count, pct))
             
-            lines.append("")
-        
-        return lines
+            yield ""
     
     @staticmethod
-    def _section_plant_sites(plant_sites: Dict[str, Any]) -> List[str]:
+    def _section_plant_sites(plant_sites: Dict[str, Any]) -> Iterator[str]:
         """Generate plant site section."""
-        lines = [
-            "## Spike Plant Sites",
-            ""
-        ]
+        yield "## Spike Plant Sites"
+        yield ""
         
         if not plant_sites:
-            lines.append("*No spike plant data available*")
-            lines.append("")
-            return lines
+            yield "*No spike plant data available*"
+            yield ""
+            return
         
         for map_name, data in sorted(plant_sites.items()):
-            lines.append(f"### {map_name}")
-            lines.append("")
-            lines.append("| Site | Plants |")
-            lines.append("|------|--------|")
+            yield f"### {map_name}"
+            yield ""
+            yield "| Site | Plants |"
+            yield "|------|--------|"
             
             counts = data.get("counts", {})
-            for site, count in sorted(counts.items(), key=lambda x: x[1], reverse=True):
-                lines.append(f"| {site} | {count} |")
+            for site, count in counts.items():
+                yield _COUNT_ROW((site, count))
             
-            lines.append("")
-        
-        return lines
+            yield ""
     
     @staticmethod
-    def _section_opening_duels(opening_duels: Dict[str, Any]) -> List[str]:
+    def _section_opening_duels(opening_duels: Dict[str, Any]) -> Iterator[str]:
         """Generate opening duel leaders section."""
-        lines = [
-            "## Opening Duel Leaders",
-            ""
-        ]
+        yield "## Opening Duel Leaders"
+        yield ""
         
         if not opening_duels:
-            lines.append("*No opening duel data available*")
-            lines.append("")
-            return lines
+            yield "*No opening duel data available*"
+            yield ""
+            return
         
-        lines.append("| Player | Kills | Deaths | Net |")
-        lines.append("|--------|-------|--------|-----|")
+        yield "| Player | Kills | Deaths | Net |"
+        yield "|--------|-------|--------|-----|"
         
-        for player, stats in list(opening_duels.items())[:10]:
+        for player, stats in opening_duels.items():
             kills = stats.get("first_kills", 0)
             deaths = stats.get("first_deaths", 0)
             net = stats.get("net", 0)
-            lines.append(f"| {player} | {kills} | {deaths} | {net:+d} |")
+            yield f"| {player} | {kills} | {deaths} | {net:+d} |"
         
-        lines.append("")
-        return lines
+        yield ""
     
     @staticmethod
-    def _section_comps(comp_frequency: Dict[str, Any]) -> List[str]:
+    def _section_comps(comp_frequency: Dict[str, Any]) -> Iterator[str]:
         """Generate agent composition section."""
-        lines = [
-            "## Agent Compositions",
-            ""
-        ]
+        yield "## Agent Compositions"
+        yield ""
         
         insufficient = comp_frequency.get("insufficient_data", True)
         if insufficient:
-            lines.append("*Insufficient agent composition data in available files*")
-            lines.append("")
-            return lines
+            yield "*Insufficient agent composition data in available files*"
+            yield ""
+            return
         
         comps_by_map = comp_frequency.get("by_map", {})
         if not comps_by_map:
-            lines.append("*No composition data available*")
-            lines.append("")
-            return lines
+            yield "*No composition data available*"
+            yield ""
+            return
         
         for map_name, data in sorted(comps_by_map.items()):
-            lines.append(f"### {map_name}")
-            lines.append("")
+            yield f"### {map_name}"
+            yield ""
             
             compositions = data.get("compositions", {})
-            for comp, count in sorted(compositions.items(), key=lambda x: x[1], reverse=True)[:5]:
-                lines.append(f"- **{comp}** ({count}x)")
+            for comp, count in islice(compositions.items(), 5):
+                yield _COMP_ROW((comp, count))
             
-            lines.append("")
-        
-        return lines
+            yield ""
     
     @staticmethod
     def _section_summary(
         maps_played: Dict[str, Any],
         attack_site_preference: Dict[str, Any],
         opening_duels: Dict[str, Any]
-    ) -> List[str]:
+    ) -> Iterator[str]:
         """Generate TL;DR summary section."""
-        lines = [
-            "## TL;DR - Key Takeaways",
-            ""
-        ]
+        yield "## TL;DR - Key Takeaways"
+        yield ""
         
         # Most played map
         maps = maps_played.get("maps", {})
         if maps:
-            most_played_map = max(maps.items(), key=lambda x: x[1])
-            lines.append(f"- **Most played map:** {most_played_map[0]} ({most_played_map[1]} times)")
+            most_played_map = next(iter(maps.items()))
+            yield f"- **Most played map:** {most_played_map[0]} ({most_played_map[1]} times)"
         
         # Most common site
         for map_name, data in list(attack_site_preference.items())[:1]:
             counts = data.get("counts", {})
             if counts:
-                most_common_site = max(counts.items(), key=lambda x: x[1])
-                lines.append(f"- **Primary site ({map_name}):** {most_common_site[0]}")
+                most_common_site = next(iter(counts.items()))
+                yield f"- **Primary site ({map_name}):** {most_common_site[0]}"
         
         # Top duel player
         if opening_duels:
             top_player = list(opening_duels.items())[0]
             net = top_player[1].get("net", 0)
-            lines.append(f"- **Strongest duel player:** {top_player[0]} (Net: {net:+d})")
-        
-        lines.append("")
+            yield f"- **Strongest duel player:** {top_player[0]} (Net: {net:+d})"
         
-        return lines
+        yield ""
@@ -1,35 +1,40 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import List, Dict, Any, Optional
 
 
-class ScoutRequest(BaseModel):
+class _FrozenModel(BaseModel):
+    """Immutable base for API models; unknown fields are dropped, not tracked."""
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
+
+class ScoutRequest(_FrozenModel):
     """Request to generate scouting report."""
     series_ids: Optional[str] = None
     team_id: Optional[str] = None
     last_n: Optional[int] = 10
 
 
-class MapStats(BaseModel):
+class MapStats(_FrozenModel):
     """Map statistics."""
     maps: Dict[str, int]
     total: int
 
 
-class SitePreference(BaseModel):
+class SitePreference(_FrozenModel):
     """Site preference for a map."""
     counts: Dict[str, int]
     percentages: Dict[str, float]
     total: int
 
 
-class PlayerDuelStats(BaseModel):
+class PlayerDuelStats(_FrozenModel):
     """Player opening duel statistics."""
     first_kills: int
     first_deaths: int
     net: int
 
 
-class ScoutResponse(BaseModel):
+class ScoutResponse(_FrozenModel):
     """Scout report response."""
     series_analyzed: List[str]
     maps_played: Dict[str, Any]
@@ -40,13 +45,13 @@ class ScoutResponse(BaseModel):
     markdown_report: str
 
 
-class HealthResponse(BaseModel):
+class HealthResponse(_FrozenModel):
     """Health check response."""
     status: str
     message: str
 
 
-class ErrorResponse(BaseModel):
+class ErrorResponse(_FrozenModel):
     """Error response."""
     error: str
     status: int
@@ -1,16 +1,27 @@
-from pydantic_settings import BaseSettings
+from functools import lru_cache
+
+from pydantic import Field
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
     """Application settings loaded from environment variables."""
     
+    model_config = SettingsConfigDict(env_file=".env", case_sensitive=False, frozen=True)
+    
     grid_api_key: str
     grid_file_api_base_url: str = "https://api.grid.gg/file-download"
     cache_dir: str = "./data/cache"
-    
-    class Config:
-        env_file = ".env"
-        case_sensitive = False
+    max_concurrent_series: int = Field(5, ge=1)
+    # Requests/s; 0 leaves throttling to GRID's X-RateLimit-* headers
+    grid_rate_limit: float = Field(0.0, ge=0)
+    grid_rate_burst: int = Field(5, ge=1)
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Load settings (and .env) once per process."""
+    return Settings()
 
 
-settings = Settings()
+settings = get_settings()